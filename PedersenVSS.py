@@ -1,96 +1,147 @@
 import hashlib
+import os
 import secrets
-from typing import List, Tuple, Dict
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Tuple, Dict
 import json
 
+try:
+    from gmpy2 import mpz, powmod, invert
+except ImportError:  # gmpy2 is optional; fall back to built-in int arithmetic
+    mpz = None
 
-class PedersenVSS:
-    def __init__(self, prime: int = 2 ** 127 - 1):
-        """Initialize Pedersen VSS with a prime field"""
+try:
+    import _vss_core
+except ImportError:  # native helpers are optional; build with `python setup.py build_ext --inplace`
+    _vss_core = None
+
+try:
+    import coincurve
+except ImportError:  # coincurve is optional; only needed for PedersenVSS_EC
+    coincurve = None
+
+# pow(a, -1, m) computes modular inverses from Python 3.8 onwards
+_HAS_POW_INVERSE = sys.version_info >= (3, 8)
+
+# Order of the secp256k1 base point G
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+
+class _VSSBase:
+    """Prime-field polynomial, share and reconstruction code shared by the VSS backends"""
+
+    _LAGRANGE_CACHE_SIZE = 256
+
+    def __init__(self, prime: int):
+        """Initialize the prime field shared by every Pedersen VSS backend"""
         self.p = prime  # Prime for finite field
-        self.g = 2  # Generator (simplified, in practice use a proper generator)
-        self.h = 3  # Second generator (should be independent of g)
 
-    def mod_inverse(self, a: int, m: int) -> int:
-        """Compute modular inverse using extended Euclidean algorithm"""
+        # Internal copy used for arithmetic: a GMP integer when gmpy2 is
+        # available. Public methods convert results back to int.
+        self._p = mpz(prime) if mpz is not None else prime
 
-        def extended_gcd(a, b):
-            if a == 0:
-                return b, 0, 1
-            gcd, x1, y1 = extended_gcd(b % a, a)
-            x = y1 - (b // a) * x1
-            y = x1
-            return gcd, x, y
+        # Unrolled Horner evaluators, generated per polynomial length
+        self._horner_cache: Dict[int, Callable] = {}
 
-        gcd, x, _ = extended_gcd(a % m, m)
-        if gcd != 1:
-            raise ValueError("Modular inverse does not exist")
-        return (x % m + m) % m
+        # Lagrange coefficients keyed by the tuple of share indices used
+        self._lagrange_cache: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+
+    def mod_inverse(self, a: int, m: int) -> int:
+        """Compute modular inverse using gmpy2.invert or the built-in pow(a, -1, m)"""
+        if mpz is not None:
+            try:
+                return int(invert(a, m))
+            except ZeroDivisionError:
+                raise ValueError("Modular inverse does not exist") from None
+        if not _HAS_POW_INVERSE:
+            gcd, x = self._egcd(a % m, m)
+            if gcd != 1:
+                raise ValueError("Modular inverse does not exist")
+            return x % m
+        try:
+            return pow(a % m, -1, m)
+        except ValueError:
+            raise ValueError("Modular inverse does not exist") from None
+
+    def _egcd(self, a: int, m: int) -> Tuple[int, int]:
+        """Iterative extended Euclid: return (gcd, s) with a*s = gcd (mod m)"""
+        old_r, r = a, m
+        old_s, s = 1, 0
+        while r:
+            q = old_r // r
+            old_r, r = r, old_r - q * r
+            old_s, s = s, old_s - q * s
+        return old_r, old_s
 
     def generate_polynomial(self, secret: int, threshold: int) -> List[int]:
         """Generate random polynomial with given secret as constant term"""
-        coefficients = [secret]
-        for _ in range(threshold - 1):
-            coefficients.append(secrets.randbelow(self.p))
-        return coefficients
+        return [secret] + [int(c) for c in self._random_field_elements(threshold - 1)]
+
+    def _random_field_elements(self, count: int) -> List[int]:
+        """Draw count uniform elements of Z_p from a single token_bytes call"""
+        if count <= 0:
+            return []
+
+        # 8 extra bytes per element keep the bias of the final reduction below 2^-64
+        byte_len = (self.p.bit_length() + 7) // 8 + 8
+        raw = secrets.token_bytes(count * byte_len)
+        return [int.from_bytes(raw[k * byte_len:(k + 1) * byte_len], 'big') % self._p
+                for k in range(count)]
 
     def evaluate_polynomial(self, coeffs: List[int], x: int) -> int:
         """Evaluate polynomial at point x using Horner's method"""
-        result = 0
-        for coeff in reversed(coeffs):
-            result = (result * x + coeff) % self.p
-        return result
-
-    def pow_mod(self, base: int, exp: int, mod: int) -> int:
-        """Fast modular exponentiation"""
-        result = 1
-        base = base % mod
-        while exp > 0:
-            if exp % 2 == 1:
-                result = (result * base) % mod
-            exp = exp >> 1
-            base = (base * base) % mod
-        return result
+        return int(self._eval_poly_rev(reversed(coeffs), x, self._p))
+
+    def _eval_poly_rev(self, rev_coeffs, x: int, p: int) -> int:
+        """Horner evaluation over coefficients given highest degree first"""
+        r = 0
+        for c in rev_coeffs:
+            r = (r * x + c) % p
+        return r
+
+    def _get_horner(self, num_coeffs: int) -> Callable:
+        """Return an unrolled Horner evaluator f(x, c, p) for num_coeffs ascending coefficients"""
+        horner = self._horner_cache.get(num_coeffs)
+        if horner is None:
+            t = num_coeffs
+            src = "def f(x, c, p):\n    r = c[%d] %% p\n" % (t - 1)
+            src += "".join(f"    r = (r * x + c[{i}]) % p\n" for i in range(t - 2, -1, -1))
+            src += "    return r\n"
+            namespace = {}
+            exec(compile(src, f"<horner_{t}>", "exec"), namespace)
+            horner = self._horner_cache[t] = namespace['f']
+        return horner
+
+    def _commit(self, a: int, b: int):
+        """Commit to the coefficient pair (a, b); implemented by each backend"""
+        raise NotImplementedError
 
     def generate_shares_and_commitments(self, secret: int, threshold: int, num_shares: int) -> Tuple[
         List[Tuple[int, int]], List[int], List[int]]:
         """Generate shares and commitments for Pedersen VSS"""
-
-        # Generate two polynomials f(x) and g(x)
-        f_coeffs = self.generate_polynomial(secret, threshold)
-        g_coeffs = self.generate_polynomial(0, threshold)  # g(0) = 0 for Pedersen VSS
-
-        # Generate shares
-        shares = []
-        for i in range(1, num_shares + 1):
-            f_i = self.evaluate_polynomial(f_coeffs, i)
-            g_i = self.evaluate_polynomial(g_coeffs, i)
-            shares.append((f_i, g_i))
-
-        # Generate commitments C_j = g^{a_j} * h^{b_j} for j = 0, 1, ..., t-1
+        if mpz is not None:
+            secret = mpz(secret)
+
+        # Generate two polynomials f(x) and g(x), with g(0) = 0 for Pedersen VSS,
+        # committing to each pair of coefficients as soon as it is drawn:
+        # C_j = g^{a_j} * h^{b_j} for j = 0, 1, ..., t-1
+        f_coeffs = [secret]
+        g_coeffs = [0]
+        randomness = iter(self._random_field_elements(2 * (threshold - 1)))
         commitments = []
         for j in range(threshold):
-            # C_j = g^{f_coeffs[j]} * h^{g_coeffs[j]} mod p
-            commitment = (self.pow_mod(self.g, f_coeffs[j], self.p) *
-                          self.pow_mod(self.h, g_coeffs[j], self.p)) % self.p
-            commitments.append(commitment)
+            if j:
+                f_coeffs.append(next(randomness))
+                g_coeffs.append(next(randomness))
+            commitments.append(self._commit(f_coeffs[j], g_coeffs[j]))
 
-        return shares, commitments, f_coeffs
-
-    def verify_share(self, share_index: int, share: Tuple[int, int], commitments: List[int], threshold: int) -> bool:
-        """Verify a share against commitments"""
-        f_i, g_i = share
+        # Generate shares with a Horner evaluator unrolled for this threshold
+        p = self._p
+        horner = self._get_horner(len(f_coeffs))
+        shares = [(int(horner(i, f_coeffs, p)), int(horner(i, g_coeffs, p))) for i in range(1, num_shares + 1)]
 
-        # Compute left side: g^{f_i} * h^{g_i}
-        left = (self.pow_mod(self.g, f_i, self.p) * self.pow_mod(self.h, g_i, self.p)) % self.p
-
-        # Compute right side: product of C_j^{i^j} for j = 0 to t-1
-        right = 1
-        for j in range(threshold):
-            power = self.pow_mod(share_index, j, self.p - 1)  # i^j mod (p-1)
-            right = (right * self.pow_mod(commitments[j], power, self.p)) % self.p
-
-        return left == right
+        return shares, commitments, [int(c) for c in f_coeffs]
 
     def lagrange_interpolation(self, shares: List[Tuple[int, Tuple[int, int]]], threshold: int) -> int:
         """Reconstruct secret using Lagrange interpolation"""
@@ -100,30 +151,269 @@ class PedersenVSS:
         # Use first 'threshold' shares
         shares = shares[:threshold]
 
+        basis = self._lagrange_basis(tuple(x_i for x_i, _ in shares))
+
+        p = self._p
         secret = 0
-        for i, (x_i, (f_i, _)) in enumerate(shares):
-            # Compute Lagrange coefficient
+        for lagrange_coeff, (_, (f_i, _)) in zip(basis, shares):
+            secret = (secret + f_i * lagrange_coeff) % p
+
+        return int(secret)
+
+    def _lagrange_basis(self, xs: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Lagrange coefficients at x = 0 for the given share indices, cached per index set"""
+        basis = self._lagrange_cache.get(xs)
+        if basis is not None:
+            return basis
+
+        p = self._p
+        n = len(xs)
+
+        # Compute Lagrange numerators and denominators for every share
+        numers = []
+        denoms = []
+        for i, x_i in enumerate(xs):
             numerator = 1
             denominator = 1
 
-            for j, (x_j, _) in enumerate(shares):
+            for j, x_j in enumerate(xs):
                 if i != j:
-                    numerator = (numerator * (-x_j)) % self.p
-                    denominator = (denominator * (x_i - x_j)) % self.p
+                    numerator = (numerator * (-x_j)) % p
+                    denominator = (denominator * (x_i - x_j)) % p
+
+            numers.append(numerator)
+            denoms.append(denominator)
 
-            # Compute lagrange coefficient
-            lagrange_coeff = (numerator * self.mod_inverse(denominator, self.p)) % self.p
-            secret = (secret + f_i * lagrange_coeff) % self.p
+        # Invert all denominators at once (Montgomery's trick):
+        # inv(d_i) = prefix[i] * suffix[i + 1] * inv(d_0 * ... * d_{n-1})
+        prefix = [1] * (n + 1)
+        for k in range(n):
+            prefix[k + 1] = (prefix[k] * denoms[k]) % p
+        suffix = [1] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            suffix[k] = (suffix[k + 1] * denoms[k]) % p
+        inv_total = self.mod_inverse(prefix[n], p)
 
-        return secret
+        basis = tuple((numers[i] * prefix[i] * suffix[i + 1] * inv_total) % p for i in range(n))
+
+        if len(self._lagrange_cache) >= self._LAGRANGE_CACHE_SIZE:
+            self._lagrange_cache.pop(next(iter(self._lagrange_cache)))
+        self._lagrange_cache[xs] = basis
+        return basis
 
     def hash_secret(self, secret: int) -> str:
         """Generate hash of secret for on-chain storage"""
         secret_bytes = secret.to_bytes(32, byteorder='big')
         return hashlib.sha256(secret_bytes).hexdigest()
 
+    def hash_secret_bytes(self, secret: int) -> bytes:
+        """Generate raw SHA-256 digest of secret for binary comparison"""
+        return hashlib.sha256(secret.to_bytes(32, byteorder='big')).digest()
+
+
+class PedersenVSS(_VSSBase):
+    def __init__(self, prime: int = 2 ** 127 - 1):
+        """Initialize Pedersen VSS with a prime field"""
+        super().__init__(prime)
+        self.g = 2  # Generator (simplified, in practice use a proper generator)
+        self.h = 3  # Second generator (should be independent of g)
+        self._g = mpz(self.g) if mpz is not None else self.g
+        self._h = mpz(self.h) if mpz is not None else self.h
+
+        # The native multi-exponentiation handles odd primes below 2^127
+        self._use_c_core = _vss_core is not None and self.p % 2 == 1 and 2 < self.p < 2 ** 127
+
+        # Fixed-base window tables for g and h, built once per instance
+        self._window = 4
+        self._g_table = self._build_window(self._g, self._p, self._window, self.p.bit_length())
+        self._h_table = self._build_window(self._h, self._p, self._window, self.p.bit_length())
+
+    def pow_mod(self, base: int, exp: int, mod: int) -> int:
+        """Fast modular exponentiation (gmpy2.powmod or built-in three-argument pow)"""
+        if mpz is not None:
+            return int(powmod(base, exp, mod))
+        return pow(base, exp, mod)
+
+    def _multi_pow_mul(self, bases: List[int], exps: List[int], p: int) -> int:
+        """Compute prod(b^e) mod p, sharing one squaring chain across all bases
+
+        Small exponents (the usual i^j for few trustees) go straight to
+        built-in pow. The shared squaring chain runs natively when _vss_core
+        is built. In pure Python it only pays off for many wide exponents
+        without gmpy2.
+        """
+        max_bits = max((e.bit_length() for e in exps), default=0)
+        non_negative = all(e >= 0 for e in exps)
+        if max_bits > 8 and non_negative:
+            if self._use_c_core and p == self.p and max_bits <= 128:
+                return _vss_core.multi_pow_mul([int(b) for b in bases], [int(e) for e in exps], int(p))
+            use_shared_chain = mpz is None and len(bases) >= 10 and max_bits >= 100
+        else:
+            use_shared_chain = False
+
+        if not use_shared_chain:
+            acc = 1
+            for b, e in zip(bases, exps):
+                acc = (acc * pow(b, e, p)) % p
+            return acc % p
+
+        bases = [b % p for b in bases]
+        acc = 1
+        for bit in range(max_bits - 1, -1, -1):
+            acc = (acc * acc) % p
+            for b, e in zip(bases, exps):
+                if (e >> bit) & 1:
+                    acc = (acc * b) % p
+        return acc % p
+
+    def _build_window(self, base: int, p: int, w: int, bits: int) -> List[List[int]]:
+        """Precompute table[k][i] = base^(i * 2^(w*k)) mod p for fixed-base exponentiation"""
+        table = []
+        row_base = base % p
+        for _ in range((bits + w - 1) // w):
+            row = [1 % p]
+            for _ in range((1 << w) - 1):
+                row.append((row[-1] * row_base) % p)
+            table.append(row)
+            # base^(2^(w*(k+1))) = (base^(2^(w*k)))^(2^w)
+            row_base = (row[-1] * row_base) % p
+        return table
+
+    def _pow_with_table(self, table: List[List[int]], exp: int) -> int:
+        """Compute base^exp mod p from a table built by _build_window"""
+        w = self._window
+        mask = (1 << w) - 1
+        p = self._p
+        result = 1
+        k = 0
+        while exp:
+            digit = exp & mask
+            if digit:
+                result = (result * table[k][digit]) % p
+            exp >>= w
+            k += 1
+        return result % p
+
+    def _commit(self, a: int, b: int) -> int:
+        """Compute g^a * h^b mod p using the precomputed g and h tables"""
+        max_bits = len(self._g_table) * self._window
+        if a < 0 or b < 0 or a.bit_length() > max_bits or b.bit_length() > max_bits:
+            return int((pow(self._g, a, self._p) * pow(self._h, b, self._p)) % self._p)
+        return int((self._pow_with_table(self._g_table, a) *
+                    self._pow_with_table(self._h_table, b)) % self._p)
+
+    def verify_share(self, share_index: int, share: Tuple[int, int], commitments: List[int], threshold: int) -> bool:
+        """Verify a share against commitments"""
+        f_i, g_i = share
+
+        # Compute left side: g^{f_i} * h^{g_i}
+        left = self._commit(f_i, g_i)
+
+        # Compute right side: product of C_j^{i^j} for j = 0 to t-1
+        # i^j stays below p-1 for realistic indices and thresholds, so only
+        # reduce once a power reaches the bit length of p-1. Reducing the
+        # index first keeps every power non-negative.
+        order = self._p - 1
+        limit = order.bit_length()
+        index = share_index % order
+        powers = []
+        power = 1
+        for _ in range(threshold):
+            powers.append(power)
+            power = power * index
+            if power.bit_length() >= limit:
+                power %= order
+
+        bases = [commitments[j] for j in range(threshold)]
+        right = self._multi_pow_mul(bases, powers, self._p)
+
+        return left == right
+
+
+class PedersenVSS_EC(_VSSBase):
+    """Pedersen VSS with commitments in the secp256k1 group (via libsecp256k1)
+
+    Shares and coefficients live in Z_n for the curve order n (stored as p), and a
+    commitment C_j = a_j*G + b_j*H is a curve point. Points are coincurve
+    PublicKey objects, with None standing for the point at infinity.
+    """
+
+    def __init__(self):
+        if coincurve is None:
+            raise ImportError("PedersenVSS_EC requires the coincurve package")
+        super().__init__(SECP256K1_ORDER)
+        self.G = coincurve.PrivateKey.from_int(1).public_key
+        self.H = self._derive_generator(b"CryptoWill Pedersen H")
+
+    def _derive_generator(self, seed: bytes):
+        """Hash seed to a curve point whose discrete log w.r.t. G is unknown"""
+        counter = 0
+        while True:
+            x = hashlib.sha256(seed + counter.to_bytes(4, byteorder='big')).digest()
+            try:
+                return coincurve.PublicKey(b"\x02" + x)
+            except ValueError:
+                counter += 1
+
+    def _ec_mul(self, point, k: int):
+        """Compute k*point, returning None for the point at infinity"""
+        k = int(k) % self.p
+        if k == 0 or point is None:
+            return None
+        if point is self.G:
+            return coincurve.PrivateKey.from_int(k).public_key
+        return point.multiply(k.to_bytes(32, byteorder='big'))
+
+    def _ec_add(self, points):
+        """Sum curve points, returning None for the point at infinity"""
+        points = [pt for pt in points if pt is not None]
+        if not points:
+            return None
+        if len(points) == 1:
+            return points[0]
+        try:
+            return coincurve.PublicKey.combine_keys(points)
+        except ValueError:  # the sum is the point at infinity
+            return None
+
+    def _commit(self, a: int, b: int):
+        """Compute a*G + b*H"""
+        return self._ec_add([self._ec_mul(self.G, a), self._ec_mul(self.H, b)])
+
+    def verify_share(self, share_index: int, share: Tuple[int, int], commitments: List, threshold: int) -> bool:
+        """Verify a share: f_i*G + g_i*H == sum of (i^j)*C_j for j = 0 to t-1"""
+        f_i, g_i = share
+        left = self._commit(f_i, g_i)
+
+        terms = []
+        power = 1  # i^j mod n, updated incrementally
+        for j in range(threshold):
+            terms.append(self._ec_mul(commitments[j], power))
+            power = (power * share_index) % self.p
+        right = self._ec_add(terms)
+
+        if left is None or right is None:
+            return left is right
+        return left.format() == right.format()
+
+
+# Per-process PedersenVSS instances used by _verify_one, keyed by prime
+_worker_vss: Dict[int, PedersenVSS] = {}
+
+
+def _verify_one(task: Tuple[int, Tuple[int, int], List[int], int, int]) -> bool:
+    """Verify one trustee share in a worker process"""
+    share_index, share, commitments, threshold, prime = task
+    vss = _worker_vss.get(prime)
+    if vss is None:
+        vss = _worker_vss[prime] = PedersenVSS(prime)
+    return vss.verify_share(share_index, share, commitments, threshold)
+
 
 class CryptoWill:
+    # Below this many trustees, process start-up outweighs the verification work
+    _PARALLEL_MIN_TRUSTEES = 1000
+
     def __init__(self, prime: int = 2 ** 127 - 1):
         self.vss = PedersenVSS(prime)
 
@@ -194,6 +484,28 @@ class CryptoWill:
 
         return is_valid
 
+    def verify_all_trustees(self, will_data: Dict) -> List[bool]:
+        """Verify every trustee's share, in parallel across processes for large wills"""
+        num_trustees = will_data['num_trustees']
+        max_workers = min(os.cpu_count() or 1, num_trustees)
+        if max_workers <= 1 or num_trustees < self._PARALLEL_MIN_TRUSTEES:
+            return [self.verify_trustee_share(will_data, i) for i in range(1, num_trustees + 1)]
+
+        tasks = [
+            (i, tuple(will_data['trustee_shares'][i - 1]['share']), will_data['commitments'],
+             will_data['threshold'], will_data['prime'])
+            for i in range(1, num_trustees + 1)
+        ]
+        chunksize = -(-len(tasks) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_verify_one, tasks, chunksize=chunksize))
+
+        for trustee_data, is_valid in zip(will_data['trustee_shares'], results):
+            if is_valid:
+                trustee_data['verified'] = True
+
+        return results
+
     def reconstruct_secret(self, will_data: Dict, revealed_shares: List[Tuple[int, Tuple[int, int]]]) -> Tuple[
         bool, int]:
         """Reconstruct secret from revealed shares"""
@@ -205,9 +517,9 @@ class CryptoWill:
             will_data['threshold']
         )
 
-        # Verify reconstructed secret matches original hash
-        reconstructed_hash = self.vss.hash_secret(reconstructed_secret)
-        original_hash = will_data['secret_hash']
+        # Verify reconstructed secret matches original hash, comparing raw digests
+        reconstructed_hash = self.vss.hash_secret_bytes(reconstructed_secret)
+        original_hash = bytes.fromhex(will_data['secret_hash'])
 
         return reconstructed_hash == original_hash, reconstructed_secret
 
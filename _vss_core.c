@@ -0,0 +1,315 @@
+/*
+ * Native helpers for PedersenVSS.
+ *
+ * multi_pow_mul(bases, exps, p) computes prod(b^e) mod p for an odd prime
+ * p < 2^127 with simultaneous exponentiation (one squaring chain shared by
+ * every base). Field elements are held in Montgomery form with R = 2^128 and
+ * multiplied with a two-limb CIOS Montgomery product on unsigned __int128.
+ * For the Mersenne prime p = 2^127 - 1 the product is instead reduced with
+ * shifts and adds, since 2^127 = 1 (mod p).
+ *
+ * Build in place with:  python setup.py build_ext --inplace
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+
+#if !defined(__SIZEOF_INT128__)
+#error "_vss_core requires a compiler with unsigned __int128 support"
+#endif
+
+typedef uint64_t u64;
+typedef unsigned __int128 u128;
+
+typedef struct {
+    u128 p;
+    u64 p0, p1;
+    u64 pinv;   /* -p^{-1} mod 2^64 */
+    u128 r2;    /* R^2 mod p */
+    u128 one;   /* R mod p, i.e. 1 in Montgomery form */
+    int mersenne; /* p == 2^127 - 1: skip Montgomery form entirely */
+} mont_ctx;
+
+#define MERSENNE_127 ((((u128)1) << 127) - 1)
+
+static inline u128 add_mod(u128 a, u128 b, u128 p)
+{
+    /* a, b < p < 2^127, so a + b cannot overflow */
+    u128 s = a + b;
+    return s >= p ? s - p : s;
+}
+
+static u128 mont_mul(const mont_ctx *ctx, u128 a, u128 b)
+{
+    u64 a0 = (u64)a, a1 = (u64)(a >> 64);
+    u64 b_limbs[2] = {(u64)b, (u64)(b >> 64)};
+    u64 t0 = 0, t1 = 0, t2 = 0, t3, m, c;
+    u128 uv;
+    int i;
+
+    for (i = 0; i < 2; i++) {
+        u64 bi = b_limbs[i];
+
+        uv = (u128)a0 * bi + t0;
+        t0 = (u64)uv;
+        c = (u64)(uv >> 64);
+        uv = (u128)a1 * bi + t1 + c;
+        t1 = (u64)uv;
+        c = (u64)(uv >> 64);
+        uv = (u128)t2 + c;
+        t2 = (u64)uv;
+        t3 = (u64)(uv >> 64);
+
+        m = t0 * ctx->pinv;
+        uv = (u128)m * ctx->p0 + t0;
+        c = (u64)(uv >> 64);
+        uv = (u128)m * ctx->p1 + t1 + c;
+        t0 = (u64)uv;
+        c = (u64)(uv >> 64);
+        uv = (u128)t2 + c;
+        t1 = (u64)uv;
+        c = (u64)(uv >> 64);
+        t2 = t3 + c;
+    }
+
+    uv = ((u128)t1 << 64) | t0;
+    if (t2 || uv >= ctx->p)
+        uv -= ctx->p;
+    return uv;
+}
+
+/* a * b mod 2^127 - 1 for a, b < 2^127 - 1 */
+static inline u128 mersenne_mul(u128 a, u128 b)
+{
+    u64 a0 = (u64)a, a1 = (u64)(a >> 64);
+    u64 b0 = (u64)b, b1 = (u64)(b >> 64);
+    u128 ll = (u128)a0 * b0;
+    u128 mid = (u128)a0 * b1 + (u128)a1 * b0;   /* a1, b1 < 2^63: no overflow */
+    u128 hi = (u128)a1 * b1;
+    u128 lo = ll + (mid << 64);
+    u128 s;
+
+    hi += (mid >> 64) + (lo < ll);
+    /* x = lo + hi * 2^128 with 2^127 = 1 and 2^128 = 2 (mod p), hi < 2^126 */
+    s = (lo & MERSENNE_127) + (lo >> 127) + (hi << 1);
+    s = (s & MERSENNE_127) + (s >> 127);
+    return s >= MERSENNE_127 ? s - MERSENNE_127 : s;
+}
+
+static inline u128 field_mul(const mont_ctx *ctx, u128 a, u128 b)
+{
+    return ctx->mersenne ? mersenne_mul(a, b) : mont_mul(ctx, a, b);
+}
+
+static void mont_init(mont_ctx *ctx, u128 p)
+{
+    u64 inv;
+    u128 r = 1;
+    int i;
+
+    ctx->p = p;
+    ctx->p0 = (u64)p;
+    ctx->p1 = (u64)(p >> 64);
+    ctx->mersenne = p == MERSENNE_127;
+    if (ctx->mersenne) {
+        ctx->pinv = 0;
+        ctx->r2 = 1;
+        ctx->one = 1;
+        return;
+    }
+
+    /* Newton iteration for p0^{-1} mod 2^64: p0 * p0 = 1 mod 8 for odd p0 */
+    inv = ctx->p0;
+    for (i = 0; i < 5; i++)
+        inv *= 2 - ctx->p0 * inv;
+    ctx->pinv = (u64)0 - inv;
+
+    /* Double 1 up to R = 2^128 and then R^2 = 2^256, reducing mod p */
+    for (i = 0; i < 128; i++)
+        r = add_mod(r, r, p);
+    ctx->one = r;
+    for (i = 0; i < 128; i++)
+        r = add_mod(r, r, p);
+    ctx->r2 = r;
+}
+
+/* Convert a non-negative Python int below 2^128 to u128; -1 on error */
+static int pylong_to_u128(PyObject *obj, u128 *out)
+{
+    PyObject *index, *zero, *shift, *hi_obj, *top;
+    u64 lo, hi;
+    int negative, overflow;
+
+    index = PyNumber_Index(obj);
+    if (index == NULL)
+        return -1;
+    zero = PyLong_FromLong(0);
+    if (zero == NULL) {
+        Py_DECREF(index);
+        return -1;
+    }
+    negative = PyObject_RichCompareBool(index, zero, Py_LT);
+    Py_DECREF(zero);
+    if (negative) {
+        Py_DECREF(index);
+        if (negative > 0)
+            PyErr_SetString(PyExc_ValueError, "value must be non-negative");
+        return -1;
+    }
+
+    shift = PyLong_FromLong(64);
+    if (shift == NULL) {
+        Py_DECREF(index);
+        return -1;
+    }
+    lo = PyLong_AsUnsignedLongLongMask(index);
+    hi_obj = PyNumber_Rshift(index, shift);
+    Py_DECREF(index);
+    if (hi_obj == NULL) {
+        Py_DECREF(shift);
+        return -1;
+    }
+    hi = PyLong_AsUnsignedLongLongMask(hi_obj);
+    top = PyNumber_Rshift(hi_obj, shift);
+    Py_DECREF(hi_obj);
+    Py_DECREF(shift);
+    if (top == NULL)
+        return -1;
+    overflow = PyObject_IsTrue(top);
+    Py_DECREF(top);
+    if (overflow) {
+        if (overflow > 0)
+            PyErr_SetString(PyExc_ValueError, "value must be below 2^128");
+        return -1;
+    }
+    if (PyErr_Occurred())
+        return -1;
+
+    *out = ((u128)hi << 64) | lo;
+    return 0;
+}
+
+static PyObject *u128_to_pylong(u128 v)
+{
+    PyObject *hi, *lo, *shift, *shifted, *result;
+
+    hi = PyLong_FromUnsignedLongLong((u64)(v >> 64));
+    lo = PyLong_FromUnsignedLongLong((u64)v);
+    shift = PyLong_FromLong(64);
+    if (hi == NULL || lo == NULL || shift == NULL) {
+        Py_XDECREF(hi);
+        Py_XDECREF(lo);
+        Py_XDECREF(shift);
+        return NULL;
+    }
+    shifted = PyNumber_Lshift(hi, shift);
+    Py_DECREF(hi);
+    Py_DECREF(shift);
+    if (shifted == NULL) {
+        Py_DECREF(lo);
+        return NULL;
+    }
+    result = PyNumber_Or(shifted, lo);
+    Py_DECREF(shifted);
+    Py_DECREF(lo);
+    return result;
+}
+
+static PyObject *multi_pow_mul(PyObject *self, PyObject *args)
+{
+    PyObject *bases_obj, *exps_obj, *p_obj;
+    PyObject *bases = NULL, *exps = NULL, *result = NULL;
+    u128 p, acc, *b = NULL, *e = NULL;
+    Py_ssize_t n, j;
+    int bit, max_bits = 0;
+    mont_ctx ctx;
+
+    if (!PyArg_ParseTuple(args, "OOO:multi_pow_mul", &bases_obj, &exps_obj, &p_obj))
+        return NULL;
+
+    if (pylong_to_u128(p_obj, &p) < 0)
+        return NULL;
+    if (p < 3 || !(p & 1) || (p >> 127)) {
+        PyErr_SetString(PyExc_ValueError, "p must be an odd prime below 2^127");
+        return NULL;
+    }
+
+    bases = PySequence_Fast(bases_obj, "bases must be a sequence");
+    if (bases == NULL)
+        goto done;
+    exps = PySequence_Fast(exps_obj, "exps must be a sequence");
+    if (exps == NULL)
+        goto done;
+    n = PySequence_Fast_GET_SIZE(bases);
+    if (PySequence_Fast_GET_SIZE(exps) != n) {
+        PyErr_SetString(PyExc_ValueError, "bases and exps must have the same length");
+        goto done;
+    }
+
+    mont_init(&ctx, p);
+    b = PyMem_Malloc((n ? n : 1) * sizeof(u128));
+    e = PyMem_Malloc((n ? n : 1) * sizeof(u128));
+    if (b == NULL || e == NULL) {
+        PyErr_NoMemory();
+        goto done;
+    }
+
+    for (j = 0; j < n; j++) {
+        PyObject *reduced = PyNumber_Remainder(PySequence_Fast_GET_ITEM(bases, j), p_obj);
+        int rc;
+        u128 v;
+
+        if (reduced == NULL)
+            goto done;
+        rc = pylong_to_u128(reduced, &v);
+        Py_DECREF(reduced);
+        if (rc < 0)
+            goto done;
+        b[j] = field_mul(&ctx, v, ctx.r2);
+
+        if (pylong_to_u128(PySequence_Fast_GET_ITEM(exps, j), &e[j]) < 0)
+            goto done;
+        for (bit = 127; bit >= max_bits; bit--) {
+            if ((e[j] >> bit) & 1) {
+                max_bits = bit + 1;
+                break;
+            }
+        }
+    }
+
+    acc = ctx.one;
+    for (bit = max_bits - 1; bit >= 0; bit--) {
+        acc = field_mul(&ctx, acc, acc);
+        for (j = 0; j < n; j++) {
+            if ((e[j] >> bit) & 1)
+                acc = field_mul(&ctx, acc, b[j]);
+        }
+    }
+    result = u128_to_pylong(field_mul(&ctx, acc, 1));
+
+done:
+    PyMem_Free(b);
+    PyMem_Free(e);
+    Py_XDECREF(bases);
+    Py_XDECREF(exps);
+    return result;
+}
+
+static PyMethodDef vss_core_methods[] = {
+    {"multi_pow_mul", multi_pow_mul, METH_VARARGS,
+     "multi_pow_mul(bases, exps, p) -> prod(b^e) mod p for an odd prime p < 2^127"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef vss_core_module = {
+    PyModuleDef_HEAD_INIT,
+    "_vss_core",
+    "Native Montgomery multi-exponentiation for PedersenVSS",
+    -1,
+    vss_core_methods
+};
+
+PyMODINIT_FUNC PyInit__vss_core(void)
+{
+    return PyModule_Create(&vss_core_module);
+}
@@ -0,0 +1,11 @@
+"""Build the optional _vss_core extension used by PedersenVSS.py
+
+    python setup.py build_ext --inplace
+"""
+from setuptools import Extension, setup
+
+setup(
+    name="cryptowill-vss-core",
+    version="0.1.0",
+    ext_modules=[Extension("_vss_core", ["_vss_core.c"], extra_compile_args=["-O3"])],
+)